@@ -2,15 +2,53 @@ import os
 import re
 import sys
 import time
-import yaml
+import random
 import shutil
 import requests
 import tempfile
 import json
+import queue
+import logging
+import logging.handlers
+import http.cookiejar
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
+from urllib3.util.retry import Retry
 from tqdm import tqdm
-from typing import Dict, List, Optional, Tuple
+from tqdm.utils import CallbackIOWrapper
+from typing import Any, Dict, Generic, Iterator, List, Optional, Set, Tuple, TypeVar, Union
 from config import LANZOU_CONFIG
 
+# JSON解析优先使用orjson/ujson，未安装时回退到标准库
+try:
+    import orjson as _json
+except ImportError:
+    try:
+        import ujson as _json
+    except ImportError:
+        import json as _json
+
+# 安装ijson后流式解析release信息，只提取需要的字段
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# 安装msgspec后按结构直接解析蓝奏云列表接口，跳过不需要的字段
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Python 3.11+ 自带TOML解析
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
 # 终端颜色
 GREEN = "\033[92m"      # 成功
 RED = "\033[91m"        # 错误
@@ -19,134 +57,496 @@ YELLOW = "\033[93m"     # 警告
 CYAN = "\033[96m"       # 提示
 RESET = "\033[0m"       # 重置颜色
 
+# 状态消息，导入时生成一次，%s/%d为日志参数
+MSG_TITLE = f"\n{BLUE}=== GitHub Release 自动下载上传工具 ==={RESET}"
+MSG_TEMP_DIR = f"{BLUE}[初始化] 创建临时目录: %s{RESET}"
+MSG_RUN_TASKS = f"\n{BLUE}[开始] 并发处理 %d 个任务{RESET}"
+MSG_TASK_START = f"\n{BLUE}=== 处理任务 ==={RESET}"
+MSG_STEP_FOLDER = f"\n{BLUE}[1/3] 创建目标文件夹{RESET}"
+MSG_STEP_DOWNLOAD = f"\n{BLUE}[2/3] 下载文件 (共%d个){RESET}"
+MSG_STEP_UPLOAD = f"\n{BLUE}[3/3] 上传文件 (%d/%d){RESET}"
+MSG_TEMP_FILE_REMOVED = f"{BLUE}[清理] 删除临时文件: %s{RESET}"
+MSG_TASK_DONE = f"\n{GREEN}✓ 任务完成{RESET}"
+MSG_TEMP_DIR_REMOVED = f"\n{BLUE}[清理] 删除临时目录{RESET}"
+MSG_ALL_DONE = f"\n{GREEN}=== 所有任务处理完成 ==={RESET}"
+MSG_LOGIN_OK = f"{GREEN}✓ 登录成功!{RESET}"
+MSG_COOKIE_LOGIN_OK = f"{GREEN}✓ 使用已保存的登录状态{RESET}"
+MSG_FOLDER_CREATED = f"{GREEN}✓ 创建成功，文件夹ID: %s{RESET}"
+MSG_UPLOAD_OK = f"{GREEN}✓ 文件上传成功{RESET}"
+
+logger = logging.getLogger("g2l")
+_Log = Union[logging.Logger, logging.LoggerAdapter]  # 模块日志记录器或带任务前缀的适配器
+
+class _ColorFormatter(logging.Formatter):
+    """按日志级别为错误和警告添加颜色与状态符号"""
+    LEVEL_FORMATS = {
+        logging.ERROR: f"{RED}✗ %s{RESET}",
+        logging.WARNING: f"{YELLOW}! %s{RESET}",
+    }
+    
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        level_format = self.LEVEL_FORMATS.get(record.levelno)
+        return level_format % message if level_format else message
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """配置日志输出
+    工作线程只把日志放入队列，由监听线程统一写到终端，避免多线程争用stdout
+    Returns:
+        QueueListener: 日志监听器，程序结束前需要调用stop()
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(_ColorFormatter())
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+# GitHub仓库URL，提取owner和repo（兼容.git后缀、末尾斜杠和查询参数）
+_GH_URL_RE = re.compile(r"github\.com/([^/]+)/([^/?#]+?)(?:\.git)?(?:[/?#]|$)")
+_ALLOWED_SUFFIXES = ('.apk', '.exe', '.zip')  # 需要下载的资源文件类型
+_SOURCE_TOKENS = ('source', 'src')  # 文件名包含这些字样的视为源代码，不下载
+
+# 本地缓存
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'g-to-lan')
+RELEASE_CACHE_FILE = os.path.join(CACHE_DIR, 'releases.json')
+RELEASE_CACHE_TTL = 5 * 60  # 缓存有效期内直接使用缓存，不再请求GitHub(秒)
+LANZOU_CACHE_FILE = os.path.join(CACHE_DIR, 'lanzou.json')
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 下载时每次读取和写入文件的块大小
+DOWNLOAD_WORKERS = 4  # 同一任务内同时下载的文件数
+TASK_WORKERS = 4  # 同时处理的任务数
+LANZOU_PAGE_SIZE = 50  # 蓝奏云文件列表每页记录数
+LOGIN_PAGE_MARKER = "登录".encode('utf-8')  # 未登录时页面中包含的文字
+THROTTLE_INFO = "请求过快"  # 蓝奏云限流时响应info字段中的文字
+# THROTTLE_INFO在响应原始字节中的形式(原文或JSON转义)，用于解析前粗查
+THROTTLE_MARKERS = (THROTTLE_INFO.encode('utf-8'), THROTTLE_INFO.encode('unicode_escape'))
+THROTTLE_MAX_ATTEMPTS = 5  # 被限流时最多请求的次数
+THROTTLE_MAX_DELAY = 30  # 限流重试的最长等待时间(秒)
+
+# GitHub API和文件下载共用的会话，复用连接(keep-alive)，遇到限流和服务端错误时退避重试
+_HTTP = requests.Session()
+_HTTP.headers['User-Agent'] = 'g-to-lan'
+# 设置GITHUB_TOKEN环境变量后使用认证请求，速率限制由60次/小时提升到5000次/小时
+if os.environ.get('GITHUB_TOKEN'):
+    _HTTP.headers['Authorization'] = f"Bearer {os.environ['GITHUB_TOKEN']}"
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False  # 重试用尽后返回最后的响应，由调用方处理状态码
+    )
+)
+_HTTP.mount('http://', _HTTP_ADAPTER)
+_HTTP.mount('https://', _HTTP_ADAPTER)
+
+_release_cache: Optional[Dict] = None
+_release_cache_lock = threading.Lock()
+
+def _write_json_file(path: str, data: Any):
+    """写入JSON文件，先写临时文件再替换，中途失败不会留下不完整的文件
+    Args:
+        path: 文件路径
+        data: 要保存的内容
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _read_yaml_tasks(path: str) -> Dict:
+    """读取YAML任务配置
+    解析结果缓存为同名的.json文件，YAML未修改时直接读取缓存
+    Args:
+        path: YAML文件路径
+    Returns:
+        Dict: 配置内容
+    """
+    cache_path = f"{path}.json"
+    if os.path.exists(cache_path) and os.stat(cache_path).st_mtime_ns > os.stat(path).st_mtime_ns:
+        try:
+            with open(cache_path, 'rb') as f:
+                return _json.loads(f.read())
+        except ValueError:
+            # 缓存损坏时重新解析YAML并覆盖缓存
+            pass
+            
+    # 只有需要解析YAML时才导入PyYAML，优先使用libyaml的C实现
+    import yaml
+    try:
+        from yaml import CSafeLoader as Loader
+    except ImportError:
+        from yaml import SafeLoader as Loader
+    with open(path, 'r', encoding='utf-8') as f:
+        config = yaml.load(f.read(), Loader=Loader)
+        
+    try:
+        _write_json_file(cache_path, config)
+    except Exception as e:
+        logger.warning("保存配置缓存失败: %s", e)
+    return config
+
 def read_tasks() -> List[Dict]:
-    """读取YAML配置文件中的下载任务"""
+    """读取配置文件中的下载任务
+    依次查找download_tasks.toml(需Python 3.11+)、download_tasks.json、download_tasks.yaml，
+    使用第一个存在的文件
+    """
     try:
-        with open('download_tasks.yaml', 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
-            return config.get('tasks', [])
+        if tomllib is not None and os.path.exists('download_tasks.toml'):
+            with open('download_tasks.toml', 'rb') as f:
+                config = tomllib.load(f)
+        elif os.path.exists('download_tasks.json'):
+            with open('download_tasks.json', 'rb') as f:
+                config = _json.loads(f.read())
+        else:
+            config = _read_yaml_tasks('download_tasks.yaml')
+        return config.get('tasks', [])
     except Exception as e:
-        print(f"{RED}✗ 读取配置文件失败: {str(e)}{RESET}")
+        logger.error("读取配置文件失败: %s", e)
         return []
 
-def get_latest_release(url: str) -> Optional[List[Tuple[str, str]]]:
+def _get_release_cache() -> Dict:
+    """获取release缓存，首次调用时从缓存文件加载
+    Returns:
+        Dict: {"owner/repo": {etag, last_modified, assets, checked_at}}
+    """
+    global _release_cache
+    if _release_cache is None:
+        try:
+            with open(RELEASE_CACHE_FILE, 'rb') as f:
+                _release_cache = _json.loads(f.read())
+        except Exception:
+            _release_cache = {}
+    return _release_cache
+
+def _save_release_cache():
+    """保存release缓存到文件"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(RELEASE_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(_release_cache, f, ensure_ascii=False)
+    except Exception as e:
+        logger.warning("保存release缓存失败: %s", e)
+
+def _parse_release(response: requests.Response) -> List[List[str]]:
+    """解析release信息，只提取资源文件的名称和下载链接
+    Args:
+        response: GitHub API的release响应(stream=True)
+    Returns:
+        List[List[str]]: [[文件名, 下载链接]]
+    """
+    if ijson is None:
+        release_data = _json.loads(response.content)
+        return [
+            [asset.get('name', ''), asset.get('browser_download_url', '')]
+            for asset in release_data.get('assets', [])
+        ]
+        
+    # 边接收边按事件流解析，不构建作者、上传者等无用字段；
+    # assets数组结束后即停止，不再读取之后的release说明等内容
+    response.raw.decode_content = True
+    assets = []
+    for prefix, event, value in ijson.parse(response.raw):
+        if prefix == 'assets.item' and event == 'start_map':
+            assets.append(['', ''])
+        elif prefix == 'assets.item.name':
+            assets[-1][0] = value
+        elif prefix == 'assets.item.browser_download_url':
+            assets[-1][1] = value
+        elif prefix == 'assets' and event == 'end_array':
+            break
+    return assets
+
+def _select_assets(assets: List[List[str]]) -> List[Tuple[str, str]]:
+    """筛选需要下载的资源文件：只下载apk、exe和zip文件，
+    排除源代码zip文件（通常包含 'source' 或 'src' 字样）
+    Args:
+        assets: [[文件名, 下载链接]]
+    Returns:
+        List[Tuple[str, str]]: [(下载链接, 文件名)]
+    """
+    return [
+        (download_url, name)
+        for name, download_url in assets
+        if (lower_name := name.lower()).endswith(_ALLOWED_SUFFIXES)
+        and not any(token in lower_name for token in _SOURCE_TOKENS)
+        and download_url
+    ]
+
+def get_latest_release(url: str, log: _Log = logger) -> Optional[List[Tuple[str, str]]]:
     """获取GitHub最新release信息
+    缓存的是release中全部资源文件的名称和下载链接，命中缓存时同样重新筛选
     Args:
         url: GitHub release页面URL
+        log: 日志记录器，并发处理任务时带有任务前缀
     Returns:
         List[Tuple[str, str]]: [(下载链接, 文件名)], 失败返回None
     """
     try:
         # 从URL中提取owner和repo
-        pattern = r"github\.com/([^/]+)/([^/]+)"
-        match = re.search(pattern, url)
+        match = _GH_URL_RE.search(url)
         if not match:
-            print(f"{RED}✗ 无效的GitHub URL{RESET}")
+            log.error("无效的GitHub URL")
             return None
             
         owner, repo = match.groups()
+        repo_key = f"{owner}/{repo}"
         
-        # 获取最新release信息
-        api_url = f"https://api.github.com/repos/{owner}/{repo}/releases/latest"
-        response = requests.get(api_url)
-        
-        if response.status_code != 200:
-            print(f"{RED}✗ 获取release信息失败: HTTP {response.status_code}{RESET}")
-            return None
+        with _release_cache_lock:
+            cached = _get_release_cache().get(repo_key)
             
-        release_data = response.json()
-        assets = release_data.get('assets', [])
+        if cached and time.time() - cached.get('checked_at', 0) < RELEASE_CACHE_TTL:
+            # 缓存未过期时直接使用缓存
+            assets = cached['assets']
+        else:
+            # 携带ETag/Last-Modified发送条件请求，未更新时GitHub返回304
+            headers = {'Accept': 'application/vnd.github+json'}
+            if cached:
+                if cached.get('etag'):
+                    headers['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    headers['If-Modified-Since'] = cached['last_modified']
+            
+            # 获取最新release信息
+            api_url = f"https://api.github.com/repos/{owner}/{repo}/releases/latest"
+            response = _HTTP.get(api_url, headers=headers, timeout=10, stream=True)
+            try:
+                if response.status_code == 304 and cached:
+                    entry = cached
+                elif response.status_code == 200:
+                    entry = {
+                        'etag': response.headers.get('ETag', ''),
+                        'last_modified': response.headers.get('Last-Modified', ''),
+                        'assets': _parse_release(response)
+                    }
+                else:
+                    log.error("获取release信息失败: HTTP %s", response.status_code)
+                    return None
+            finally:
+                # 提前结束解析时直接关闭响应，丢弃未接收的内容
+                response.close()
+                
+            # 更新缓存
+            with _release_cache_lock:
+                entry['checked_at'] = time.time()
+                _get_release_cache()[repo_key] = entry
+                _save_release_cache()
+            assets = entry['assets']
         
         if not assets:
-            print(f"{RED}✗ 没有找到可下载的文件{RESET}")
+            log.error("没有找到可下载的文件")
             return None
             
         # 获取所有符合条件的资源文件
-        download_files = []
-        for asset in assets:
-            file_name = asset.get('name', '').lower()
-            # 排除源代码zip文件（通常包含 'source' 或 'src' 字样）
-            if ('source' in file_name or 'src' in file_name):
-                continue
-            # 只下载apk、exe和zip文件
-            if file_name.endswith(('.apk', '.exe', '.zip')):
-                download_url = asset.get('browser_download_url')
-                if download_url:
-                    download_files.append((download_url, asset.get('name')))
-        
+        download_files = _select_assets(assets)
         if not download_files:
-            print(f"{RED}✗ 没有找到符合条件的文件{RESET}")
+            log.error("没有找到符合条件的文件")
             return None
             
         return download_files
         
     except Exception as e:
-        print(f"{RED}✗ 获取release信息失败: {str(e)}{RESET}")
+        log.error("获取release信息失败: %s", e)
         return None
 
-def download_file(url: str, save_path: str) -> bool:
+def _progress_bar(total: Optional[int], desc: str, position: int = 0) -> tqdm:
+    """创建按字节显示的进度条
+    最多每0.5秒刷新一次，输出不是终端(如重定向到日志文件)时不显示
+    Args:
+        total: 总字节数，未知时为None
+        desc: 进度条说明
+        position: 进度条所在行
+    Returns:
+        tqdm: 进度条
+    """
+    return tqdm(
+        total=total,
+        unit='B',
+        unit_scale=True,
+        desc=desc,
+        ncols=100,
+        position=position,
+        mininterval=0.5,
+        smoothing=0.3,
+        disable=not sys.stderr.isatty()
+    )
+
+def download_file(url: str, save_path: str, position: int = 0, log: _Log = logger) -> bool:
     """下载文件并显示进度
     Args:
         url: 下载链接
         save_path: 保存路径
+        position: 进度条所在行，多个文件同时下载时各自显示
+        log: 日志记录器，并发处理任务时带有任务前缀
     Returns:
         bool: 是否下载成功
     """
     try:
-        # 发送HEAD请求获取文件大小
-        response = requests.head(url)
-        total_size = int(response.headers.get('content-length', 0))
-        
-        # 创建进度条
-        with requests.get(url, stream=True) as r:
+        with _HTTP.get(url, stream=True) as r:
             r.raise_for_status()
+            # 文件大小直接取自下载响应头，不再单独发送HEAD请求；
+            # 响应没有Content-Length时为None，进度条只显示已下载大小
+            total_size = int(r.headers.get('content-length', 0)) or None
+            
+            # 创建进度条
             with open(save_path, 'wb') as f:
-                with tqdm(
-                    total=total_size,
-                    unit='B',
-                    unit_scale=True,
-                    desc="下载进度",
-                    ncols=100
-                ) as pbar:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            pbar.update(len(chunk))
+                with _progress_bar(total_size, os.path.basename(save_path), position) as pbar:
+                    # 在C层按块复制响应数据，每次读取后回调更新进度条
+                    r.raw.decode_content = True
+                    source = CallbackIOWrapper(pbar.update, r.raw, "read")
+                    shutil.copyfileobj(source, f, length=DOWNLOAD_CHUNK_SIZE)
                             
         return True
         
     except Exception as e:
-        print(f"{RED}✗ 下载文件失败: {str(e)}{RESET}")
+        log.error("下载文件失败: %s", e)
         if os.path.exists(save_path):
             os.remove(save_path)
         return False
 
+def _is_throttled(response: requests.Response) -> bool:
+    """判断蓝奏云是否因请求过快拒绝了请求(HTTP 429，或zt不为1且info提示请求过快)
+    文件名中也可能出现同样的文字，因此只检查解析后的info字段
+    Args:
+        response: 蓝奏云接口响应
+    Returns:
+        bool: 是否被限流
+    """
+    if response.status_code == 429:
+        return True
+    # 原始字节中没有该文字时无需解析
+    if not any(marker in response.content for marker in THROTTLE_MARKERS):
+        return False
+    try:
+        result = _json.loads(response.content)
+    except ValueError:
+        return False
+    return (isinstance(result, dict) and result.get('zt') != 1
+            and THROTTLE_INFO in str(result.get('info', '')))
+
+def _listing_unchanged(entry: Dict, first_page: List['FileInfo']) -> bool:
+    """判断上次保存的文件列表是否仍然有效
+    新上传的文件排在第一页最前面：去掉开头本工具此后上传的文件后，其余文件ID须与
+    保存时第一页的ID依次相同；第一页不满时还须数量一致。其他途径上传或删除文件
+    都会使第一页的ID对不上
+    Args:
+        entry: 缓存条目 {'page1', 'uploaded', 'names'}
+        first_page: 本次获取的第一页
+    Returns:
+        bool: 是否可以沿用保存的文件名集合
+    """
+    saved = entry['page1']
+    saved_ids = set(saved)
+    own = 0
+    for f in first_page:
+        if str(f.id) in saved_ids or (f.name_all or f.name) not in entry['uploaded']:
+            break
+        own += 1
+    rest = [str(f.id) for f in first_page[own:]]
+    if rest != saved[:len(rest)]:
+        return False
+    return len(rest) == len(saved) or len(first_page) >= LANZOU_PAGE_SIZE
+
+def _add_file_names(names: Set[str], files: List['FileInfo']):
+    """把一页文件的name和name_all加入文件名集合"""
+    for f in files:
+        names.update((f.name, f.name_all))
+    names.discard('')
+
+def _compile_constructors(cls: type) -> type:
+    """按cls._FIELDS生成专用的__init__(从字典创建)和from_row(从msgspec行数据创建)
+    生成的代码逐字段直接赋值，省去循环和每次的dict.get方法查找
+    _FIELDS: ((属性名, (数据字段, ...), 默认值), ...)，多个数据字段时取第一个非空值
+    """
+    init_lines = ["def __init__(self, data, _get=dict.get):"]
+    row_lines = ["def from_row(cls, row, _new=object.__new__):", "    info = _new(cls)"]
+    for attr, keys, default in cls._FIELDS:
+        init_lines.append(f"    self.{attr} = " + " or ".join(f"_get(data, {key!r}, {default!r})" for key in keys))
+        row_lines.append(f"    info.{attr} = " + " or ".join(f"row.{key}" for key in keys))
+    row_lines.append("    return info")
+    
+    namespace = {}
+    exec("\n".join(init_lines) + "\n\n" + "\n".join(row_lines), namespace)
+    cls.__init__ = namespace['__init__']
+    cls.from_row = classmethod(namespace['from_row'])
+    return cls
+
+@_compile_constructors
 class FileInfo:
-    def __init__(self, data: Dict):
-        self.name = data.get('name', '')  # 文件名
-        self.name_all = data.get('name_all', '')  # 完整文件名
-        self.size = data.get('size', '0')  # 文件大小
-        self.time = data.get('time', '')  # 上传时间
-        self.id = data.get('id', '')  # 文件ID
-        self.folder_id = data.get('folder_id', '0')  # 所在文件夹ID
-        self.is_dir = False
-        
+    _FIELDS = (
+        ('name', ('name',), ''),                # 文件名
+        ('name_all', ('name_all',), ''),        # 完整文件名
+        ('size', ('size',), '0'),               # 文件大小
+        ('time', ('time',), ''),                # 上传时间
+        ('id', ('id',), ''),                    # 文件ID
+        ('folder_id', ('folder_id',), '0'),     # 所在文件夹ID
+    )
+    __slots__ = tuple(field[0] for field in _FIELDS)
+    is_dir = False
+    
     def __str__(self):
         return f"{self.name_all or self.name} ({self.size})"
 
+@_compile_constructors
 class FolderInfo:
-    def __init__(self, data: Dict):
-        self.name = data.get('name', '')  # 文件夹名
-        # 优先使用fol_id,如果没有则使用folder_id
-        self.folder_id = data.get('fol_id', '') or data.get('folder_id', '')  # 文件夹ID
-        self.size = data.get('size', '0')  # 文件夹大小
-        self.time = data.get('time', '')  # 创建时间
-        self.description = data.get('folder_des', '')  # 文件夹描述
-        self.is_dir = True
-        
+    _FIELDS = (
+        ('name', ('name',), ''),                # 文件夹名
+        # 优先使用fol_id,如果没有则使用folderid/folder_id
+        ('folder_id', ('fol_id', 'folderid', 'folder_id'), ''),  # 文件夹ID
+        ('size', ('size',), '0'),               # 文件夹大小
+        ('time', ('time',), ''),                # 创建时间
+        ('description', ('folder_des',), ''),   # 文件夹描述
+    )
+    __slots__ = tuple(field[0] for field in _FIELDS)
+    is_dir = True
+    
     def __str__(self):
         return f"[目录] {self.name} (ID: {self.folder_id})"
 
+if msgspec is not None:
+    _Row = TypeVar('_Row')
+    
+    class _LzFileRow(msgspec.Struct):
+        """文件列表(task=5)的一行，未声明的字段解析时直接跳过"""
+        name: str = ''
+        name_all: str = ''
+        size: Any = '0'
+        time: str = ''
+        id: Any = ''
+        folder_id: Any = '0'
+        
+    class _LzFolderRow(msgspec.Struct):
+        """文件夹列表(task=47)的一行"""
+        name: str = ''
+        fol_id: Any = ''
+        folderid: Any = ''
+        folder_id: Any = ''
+        size: Any = '0'
+        time: str = ''
+        folder_des: str = ''
+        
+    class _LzListResponse(msgspec.Struct, Generic[_Row]):
+        """列表接口响应，没有数据时text可能为空字符串"""
+        zt: Any = 0
+        info: Any = ''
+        text: Union[List[_Row], str, None] = None
+        
+    _LIST_RESPONSE_TYPES = {
+        FileInfo: _LzListResponse[_LzFileRow],
+        FolderInfo: _LzListResponse[_LzFolderRow],
+    }
+
 class LanZouSession:
     def __init__(self, cookie_path: str):
         self.session = requests.Session()
@@ -161,21 +561,45 @@ class LanZouSession:
         self.user_info = {
             'uid': LANZOU_CONFIG.get('uid', '')
         }
+        self.doupload_url = f"{self.base_url}/doupload.php?uid={self.user_info['uid']}"
+        self._files_cache: Dict[str, Set[str]] = {}  # 文件夹ID -> 文件名集合
+        # 文件夹ID -> (待保存的缓存条目, 剩余页面迭代器)
+        self._pending_pages: Dict[str, Tuple[Dict, Iterator[List[FileInfo]]]] = {}
+        # "uid/文件夹ID" -> {'page1': 第一页文件ID, 'uploaded': 此后本工具上传的文件名, 'names': 完整的文件名集合}，跨运行保存
+        self._listing_cache = self._load_listing_cache()
+        self._folder_cache: Dict[str, Dict[str, str]] = {}  # 父文件夹ID -> {文件夹名: 文件夹ID}
+        # 多个任务并发使用同一会话：_files_lock只在读写缓存时短暂持有，
+        # 检查文件时另按文件夹加锁(请求列表期间持有)，文件夹创建单独加锁
+        self._files_lock = threading.RLock()
+        self._folder_files_locks: Dict[str, threading.Lock] = {}  # 文件夹ID -> 该文件夹的列表锁
+        self._folder_lock = threading.RLock()
         
+    def _throttled_post(self, url: str, **kwargs) -> requests.Response:
+        """发送POST请求，服务器提示请求过快时按指数退避(带随机抖动)重试，未限流时不等待
+        Args:
+            url: 完整的请求URL
+        Returns:
+            requests.Response: 最后一次请求的响应
+        """
+        for attempt in range(THROTTLE_MAX_ATTEMPTS):
+            response = self.session.post(url, **kwargs)
+            if not _is_throttled(response) or attempt == THROTTLE_MAX_ATTEMPTS - 1:
+                return response
+            delay = min(2 ** attempt + random.random(), THROTTLE_MAX_DELAY)
+            logger.warning("请求过快，%.1f秒后重试", delay)
+            time.sleep(delay)
+            
     def _post(self, url: str, data: Dict = None, files: Dict = None, **kwargs) -> Dict:
-        """发送POST请求并处理响应"""
+        """发送POST请求并处理响应
+        Args:
+            url: 完整的请求URL(需已包含uid参数，如self.doupload_url)
+        """
         try:
-            # 在URL中添加uid参数
-            if '?' in url:
-                url = f"{url}&uid={self.user_info['uid']}"
-            else:
-                url = f"{url}?uid={self.user_info['uid']}"
-                
-            response = self.session.post(url, data=data, files=files, **kwargs)
+            response = self._throttled_post(url, data=data, files=files, **kwargs)
             if response.status_code != 200:
                 raise Exception(f"请求失败: HTTP {response.status_code}")
                 
-            result = response.json()
+            result = _json.loads(response.content)
             # 如果是获取文件夹列表的请求,特殊处理
             if data and data.get("task") == "47":
                 return result
@@ -187,41 +611,118 @@ class LanZouSession:
         except Exception as e:
             raise Exception(f"请求出错: {str(e)}")
             
+    def _post_list(self, data: Dict, info_cls: type) -> List:
+        """请求列表接口(task=5/47)
+        安装msgspec时直接按结构解析响应，不构建中间字典
+        Args:
+            data: 请求参数
+            info_cls: FileInfo或FolderInfo
+        Returns:
+            List: info_cls对象列表，没有数据返回空列表
+        """
+        try:
+            response = self._throttled_post(self.doupload_url, data=data)
+            if response.status_code != 200:
+                raise Exception(f"请求失败: HTTP {response.status_code}")
+                
+            if msgspec is not None:
+                try:
+                    result = msgspec.json.decode(response.content, type=_LIST_RESPONSE_TYPES[info_cls])
+                except msgspec.ValidationError:
+                    # 响应结构与预期不符时，按普通JSON解析已收到的内容，不重新请求
+                    pass
+                else:
+                    if data.get("task") != "47" and result.zt != 1:
+                        raise Exception(result.info or '未知错误')
+                    if not isinstance(result.text, list):
+                        return []
+                    return [info_cls.from_row(row) for row in result.text]
+                    
+            result = _json.loads(response.content)
+            if data.get("task") != "47" and result.get('zt') != 1:
+                raise Exception(result.get('info', '未知错误'))
+        except Exception as e:
+            raise Exception(f"请求出错: {str(e)}")
+            
+        text = result.get('text', [])
+        if not isinstance(text, list):
+            return []
+        return [info_cls(item) for item in text]
+        
+    def _load_listing_cache(self) -> Dict[str, Dict]:
+        """从文件加载文件列表缓存"""
+        try:
+            with open(LANZOU_CACHE_FILE, 'rb') as f:
+                data = _json.loads(f.read())
+            return {
+                key: {
+                    'page1': entry['page1'],
+                    'uploaded': set(entry['uploaded']),
+                    'names': set(entry['names'])
+                }
+                for key, entry in data.items()
+            }
+        except Exception:
+            return {}
+            
+    def _save_listing_cache(self):
+        """保存文件列表缓存到文件"""
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with self._files_lock:
+                data = {
+                    key: {
+                        'page1': entry['page1'],
+                        'uploaded': sorted(entry['uploaded']),
+                        'names': sorted(entry['names'])
+                    }
+                    for key, entry in self._listing_cache.items()
+                }
+                _write_json_file(LANZOU_CACHE_FILE, data)
+        except Exception as e:
+            logger.warning("保存文件列表缓存失败: %s", e)
+            
+    def _listing_key(self, folder_id: str) -> str:
+        """文件列表缓存的键，不同账号的文件夹ID分开保存"""
+        return f"{self.user_info['uid']}/{folder_id}"
+        
     def save_cookies(self):
         """保存cookie到文件"""
-        cookie_dict = requests.utils.dict_from_cookiejar(self.session.cookies)
-        with open(self.cookie_file, 'w') as f:
-            json.dump(cookie_dict, f)
+        # 使用Netscape格式保存，保留cookie的域名、路径和过期时间
+        jar = http.cookiejar.MozillaCookieJar(self.cookie_file)
+        for cookie in self.session.cookies:
+            jar.set_cookie(cookie)
+        jar.save(ignore_discard=True)
             
     def load_cookies(self) -> bool:
         """从文件加载cookie"""
         try:
             if os.path.exists(self.cookie_file):
-                print("发现已保存的登录状态...")
-                with open(self.cookie_file, 'r') as f:
-                    cookie_dict = json.load(f)
-                    self.session.cookies = requests.utils.cookiejar_from_dict(cookie_dict)
-                print("正在验证登录状态...")
+                logger.info("发现已保存的登录状态...")
+                jar = http.cookiejar.MozillaCookieJar(self.cookie_file)
+                jar.load(ignore_discard=True)
+                self.session.cookies.update(jar)
                 if self.check_login():
-                    print(f"{GREEN}✓ 使用已保存的登录状态{RESET}")
+                    logger.info(MSG_COOKIE_LOGIN_OK)
                     return True
                 else:
-                    print(f"{YELLOW}! 登录状态已失效{RESET}")
+                    logger.warning("登录状态已失效")
                     return False
         except Exception as e:
-            print(f"{YELLOW}! 加载登录状态失败: {str(e)}{RESET}")
+            logger.warning("加载登录状态失败: %s", e)
         return False
         
     def check_login(self) -> bool:
         """检查cookie是否有效"""
         try:
-            print("正在验证登录状态...")
+            logger.info("正在验证登录状态...")
             response = self.session.get(self.mydisk_url)
-            if "登录" not in response.text:
+            # 直接在原始字节中查找，不解码整个页面
+            if LOGIN_PAGE_MARKER not in response.content:
                 self.is_login = True
                 return True
         except Exception as e:
-            print(f"验证登录状态失败: {str(e)}")
+            logger.info("验证登录状态失败: %s", e)
         return False
         
     def login(self) -> bool:
@@ -234,13 +735,13 @@ class LanZouSession:
         password = LANZOU_CONFIG.get("password")
         
         if not username or not password:
-            print(f"{RED}✗ 请在config.py中配置账号密码{RESET}")
+            logger.error("请在config.py中配置账号密码")
             return False
             
         try:
-            print("\n正在登录蓝奏云...")
-            print(f"账号: {username}")
-            print("密码: ********")
+            logger.info("\n正在登录蓝奏云...")
+            logger.info("账号: %s", username)
+            logger.info("密码: ********")
             
             # 发送登录请求
             data = {
@@ -272,29 +773,31 @@ class LanZouSession:
             )
             
             if response.status_code != 200:
-                print(f"{RED}✗ 登录请求失败{RESET}")
+                logger.error("登录请求失败")
                 return False
                 
             try:
-                result = response.json()
+                result = _json.loads(response.content)
                 if result.get('zt') == 1:
-                    print(f"{GREEN}✓ 登录成功!{RESET}")
+                    logger.info(MSG_LOGIN_OK)
                     self.save_cookies()
                     self.is_login = True
                     return True
                 else:
-                    print(f"{RED}✗ 登录失败: {result.get('info', '未知错误')}{RESET}")
+                    logger.error("登录失败: %s", result.get('info', '未知错误'))
                     return False
             except:
-                if self.check_login():
-                    print(f"{GREEN}✓ 登录成功!{RESET}")
+                # 登录成功时服务器会设置ylogin cookie，有该cookie时无需再请求页面验证
+                if self.session.cookies.get('ylogin') or self.check_login():
+                    self.is_login = True
+                    logger.info(MSG_LOGIN_OK)
                     self.save_cookies()
                     return True
-                print(f"{RED}✗ 登录失败，无法解析响应{RESET}")
+                logger.error("登录失败，无法解析响应")
                 return False
                 
         except Exception as e:
-            print(f"{RED}✗ 登录过程出错: {str(e)}{RESET}")
+            logger.error("登录过程出错: %s", e)
             return False
             
     def get_folders(self, parent_id: str = "-1") -> List[FolderInfo]:
@@ -305,104 +808,215 @@ class LanZouSession:
             List[FolderInfo]: 文件夹列表
         """
         try:
-            result = self._post(
-                f"{self.base_url}/doupload.php",
+            # text是列表时说明有子文件夹
+            return self._post_list(
                 data={
                     "task": "47",
                     "folder_id": parent_id
-                }
+                },
+                info_cls=FolderInfo
             )
             
-            folders = []
-            text = result.get('text', [])
-            # 如果text是列表,说明有子文件夹
-            if isinstance(text, list):
-                for item in text:
-                    # 修正文件夹ID字段
-                    if 'folderid' in item:
-                        item['folder_id'] = item['folderid']
-                    folders.append(FolderInfo(item))
-                    
-            return folders
-            
         except Exception as e:
-            print(f"{RED}✗ 获取文件夹列表失败: {str(e)}{RESET}")
+            logger.error("获取文件夹列表失败: %s", e)
             return []
             
-    def get_files(self, folder_id: str) -> List[FileInfo]:
-        """获取文件列表
+    def _get_files_page(self, folder_id: str, page: int) -> List[FileInfo]:
+        """获取文件列表的一页
         Args:
             folder_id: 文件夹ID
+            page: 页码，从1开始
         Returns:
-            List[FileInfo]: 文件列表
+            List[FileInfo]: 该页的文件，没有数据返回空列表
         """
-        try:
-            files = []
-            page = 1
-            
-            while True:
-                result = self._post(
-                    f"{self.base_url}/doupload.php",
-                    data={
-                        "task": "5",
-                        "folder_id": folder_id,
-                        "pg": str(page)
-                    }
-                )
-                
-                text = result.get('text', [])
-                if not isinstance(text, list) or text == "" or not text:
-                    break
-                    
-                for item in text:
-                    files.append(FileInfo(item))
+        return self._post_list(
+            data={
+                "task": "5",
+                "folder_id": folder_id,
+                "pg": str(page)
+            },
+            info_cls=FileInfo
+        )
+        
+    def _iter_files(self, folder_id: str, first_page: List[FileInfo]) -> Iterator[List[FileInfo]]:
+        """按页依次产出文件列表，只在需要后续页时才发起请求，请求失败时抛出异常
+        Args:
+            folder_id: 文件夹ID
+            first_page: 已获取的第一页
+        Yields:
+            List[FileInfo]: 一页文件
+        """
+        rows = first_page
+        yield rows
+        
+        # 满页时说明可能还有更多页，按2、4、8...页一批并发获取，直到某页不满
+        page = 2
+        batch_size = 2
+        while len(rows) >= LANZOU_PAGE_SIZE:
+            pages = range(page, page + batch_size)
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                batch = list(executor.map(lambda pg: self._get_files_page(folder_id, pg), pages))
                 
-                # 检查是否有更多页
-                if len(text) < 50:  # 通常每页50条记录
+            for rows in batch:
+                yield rows
+                if len(rows) < LANZOU_PAGE_SIZE:
                     break
                     
-                page += 1
-                time.sleep(0.5)  # 添加延时，避免请求过快
-                
-            return files
+            page += batch_size
+            batch_size *= 2
             
+    def _list_files(self, folder_id: str, first_page: List[FileInfo]) -> List[FileInfo]:
+        """获取文件列表，请求失败时抛出异常
+        Args:
+            folder_id: 文件夹ID
+            first_page: 已获取的第一页
+        Returns:
+            List[FileInfo]: 文件列表
+        """
+        return [f for rows in self._iter_files(folder_id, first_page) for f in rows]
+        
+    def get_files(self, folder_id: str) -> List[FileInfo]:
+        """获取文件列表
+        Args:
+            folder_id: 文件夹ID
+        Returns:
+            List[FileInfo]: 文件列表
+        """
+        try:
+            return self._list_files(folder_id, self._get_files_page(folder_id, 1))
         except Exception as e:
-            print(f"{RED}✗ 获取文件列表失败: {str(e)}{RESET}")
+            logger.error("获取文件列表失败: %s", e)
             return []
             
     def get_folder_id(self, folder_name: str) -> Optional[str]:
-        """获取文件夹ID
+        """获取根目录下的文件夹ID，请求失败时抛出异常
         Args:
             folder_name: 文件夹名称
         Returns:
             str: 文件夹ID, 不存在返回None
         """
-        folders = self.get_folders()
-        for folder in folders:
-            if folder.name == folder_name:
-                return folder.folder_id
-        return None
+        return self._get_folder_map("-1").get(folder_name)
+        
+    def _get_folder_map(self, parent_id: str) -> Dict[str, str]:
+        """获取子文件夹索引，同一父文件夹每次运行只请求一次文件夹列表
+        请求失败时抛出异常且不缓存，避免误以为文件夹不存在而重复创建
+        Args:
+            parent_id: 父文件夹ID
+        Returns:
+            Dict[str, str]: 文件夹名 -> 文件夹ID
+        """
+        folder_map = self._folder_cache.get(parent_id)
+        if folder_map is None:
+            folders = self._post_list(
+                data={
+                    "task": "47",
+                    "folder_id": parent_id
+                },
+                info_cls=FolderInfo
+            )
+            folder_map = {folder.name: folder.folder_id for folder in folders}
+            self._folder_cache[parent_id] = folder_map
+        return folder_map
+        
+    def _add_folder(self, parent_id: str, folder_name: str, folder_id: str):
+        """记录新创建的文件夹，新文件夹没有子文件夹也没有文件，检查文件时无需请求列表"""
+        self._get_folder_map(parent_id)[folder_name] = folder_id
+        self._folder_cache[folder_id] = {}
+        with self._files_lock:
+            names = set()
+            self._files_cache[folder_id] = names
+            self._listing_cache[self._listing_key(folder_id)] = {'page1': [], 'uploaded': set(), 'names': names}
+        
+    def _get_file_names(self, folder_id: str) -> Set[str]:
+        """获取文件夹内已知的文件名集合，同一文件夹只请求一次第一页
+        第一页之后的页面留待file_exists按需获取
+        Args:
+            folder_id: 文件夹ID
+        Returns:
+            Set[str]: 文件名集合(包含name和name_all)
+        """
+        names = self._files_cache.get(folder_id)
+        if names is not None:
+            return names
+            
+        try:
+            first_page = self._get_files_page(folder_id, 1)
+            page1 = [str(f.id) for f in first_page]
+            key = self._listing_key(folder_id)
+            with self._files_lock:
+                entry = self._listing_cache.get(key)
+                if entry is not None and _listing_unchanged(entry, first_page):
+                    # 沿用上次保存的完整文件名集合，以当前第一页为准重新记录
+                    names = entry['names']
+                    if entry['page1'] != page1 or entry['uploaded']:
+                        entry['page1'] = page1
+                        entry['uploaded'].clear()
+                        self._save_listing_cache()
+                else:
+                    self._listing_cache.pop(key, None)
+            if names is None:
+                pages = self._iter_files(folder_id, first_page)
+                names = set()
+                _add_file_names(names, next(pages))
+                entry = {'page1': page1, 'uploaded': set(), 'names': names}
+                self._pending_pages[folder_id] = (entry, pages)
+        except Exception as e:
+            logger.error("获取文件列表失败: %s", e)
+            return set()
+            
+        self._files_cache[folder_id] = names
+        return names
         
     def file_exists(self, folder_id: str, file_name: str) -> bool:
-        """检查文件是否已存在
+        """检查文件是否已存在，找到后不再获取剩余页面
         Args:
             folder_id: 文件夹ID
             file_name: 文件名
         Returns:
             bool: 是否存在
         """
-        files = self.get_files(folder_id)
-        return any(f.name == file_name or f.name_all == file_name for f in files)
+        with self._files_lock:
+            folder_lock = self._folder_files_locks.setdefault(folder_id, threading.Lock())
+            
+        # 只锁定当前文件夹，不同文件夹的列表请求可以同时进行
+        with folder_lock:
+            names = self._get_file_names(folder_id)
+            if file_name in names:
+                return True
+            
+            pending = self._pending_pages.get(folder_id)
+            if pending is None:
+                return False
+            
+            entry, pages = pending
+            try:
+                for rows in pages:
+                    _add_file_names(names, rows)
+                    if file_name in names:
+                        return True
+            except Exception as e:
+                logger.error("获取文件列表失败: %s", e)
+                del self._pending_pages[folder_id]
+                del self._files_cache[folder_id]
+                return False
+            
+            # 已获取全部页面，保存完整的文件名集合供下次运行使用
+            del self._pending_pages[folder_id]
+            with self._files_lock:
+                self._listing_cache[self._listing_key(folder_id)] = entry
+                self._save_listing_cache()
+            return False
         
-    def create_folder_path(self, folder_path: str) -> Optional[str]:
+    def create_folder_path(self, folder_path: str, log: _Log = logger) -> Optional[str]:
         """创建多层文件夹路径
         Args:
             folder_path: 文件夹路径，使用/分隔，如 "folder1/folder2/folder3"
+            log: 日志记录器，并发处理任务时带有任务前缀
         Returns:
             str: 最后一层文件夹的ID，失败返回None
         """
         if not self.is_login:
-            print(f"{RED}✗ 请先登录{RESET}")
+            log.error("请先登录")
             return None
 
         try:
@@ -411,24 +1025,19 @@ class LanZouSession:
 
             for folder_name in folders:
                 # 检查当前层级是否已存在该文件夹
-                folder_id = None
-                current_folders = self.get_folders(current_parent_id)
-                for folder in current_folders:
-                    if folder.name == folder_name:
-                        folder_id = folder.folder_id
-                        break
+                folder_id = self._get_folder_map(current_parent_id).get(folder_name)
 
                 if folder_id:
-                    print(f"{YELLOW}! 文件夹已存在: {folder_name}{RESET}")
+                    log.warning("文件夹已存在: %s", folder_name)
                     current_parent_id = folder_id
                     continue
 
-                print(f"\n[创建文件夹]")
-                print(f"文件夹名称: {folder_name}")
-                print(f"父文件夹ID: {current_parent_id}")
+                log.info("\n[创建文件夹]")
+                log.info("文件夹名称: %s", folder_name)
+                log.info("父文件夹ID: %s", current_parent_id)
 
                 result = self._post(
-                    f"{self.base_url}/doupload.php",
+                    self.doupload_url,
                     data={
                         "task": "2",
                         "parent_id": current_parent_id,
@@ -439,215 +1048,327 @@ class LanZouSession:
 
                 folder_id = result.get('text')
                 if not folder_id:
-                    print(f"{RED}✗ 创建失败，无法获取文件夹ID{RESET}")
+                    log.error("创建失败，无法获取文件夹ID")
                     return None
 
-                print(f"{GREEN}✓ 创建成功，文件夹ID: {folder_id}{RESET}")
+                log.info(MSG_FOLDER_CREATED, folder_id)
+                self._add_folder(current_parent_id, folder_name, folder_id)
                 current_parent_id = folder_id
 
             return current_parent_id
 
         except Exception as e:
-            print(f"{RED}✗ 创建文件夹路径失败: {str(e)}{RESET}")
+            log.error("创建文件夹路径失败: %s", e)
             return None
 
-    def create_folder(self, folder_name: str) -> Optional[str]:
+    def create_folder(self, folder_name: str, log: _Log = logger) -> Optional[str]:
         """在蓝奏云创建文件夹，支持根目录和多层路径
         Args:
             folder_name: 文件夹名称，支持多层路径，如 "folder1/folder2/folder3"
+            log: 日志记录器，并发处理任务时带有任务前缀
         Returns:
             str: 文件夹ID，失败返回None
         """
         if not self.is_login:
-            print(f"{RED}✗ 请先登录{RESET}")
+            log.error("请先登录")
             return None
 
-        try:
-            # 检查是否是多层路径
-            if '/' in folder_name:
-                return self.create_folder_path(folder_name)
-            
-            # 单层目录的处理
-            # 先检查文件夹是否已存在
-            folder_id = self.get_folder_id(folder_name)
-            if folder_id:
-                print(f"{YELLOW}! 文件夹已存在: {folder_name}{RESET}")
-                return folder_id
-
-            print(f"\n[创建文件夹]")
-            print(f"文件夹名称: {folder_name}")
-
-            result = self._post(
-                f"{self.base_url}/doupload.php",
-                data={
-                    "task": "2",
-                    "parent_id": "-1",  # 创建在根目录下
-                    "folder_name": folder_name,
-                    "folder_description": ""
-                }
-            )
+        # 并发的任务可能要创建同一文件夹，检查和创建需一起完成
+        with self._folder_lock:
+            try:
+                # 检查是否是多层路径
+                if '/' in folder_name:
+                    return self.create_folder_path(folder_name, log)
+            
+                # 单层目录的处理
+                # 先检查文件夹是否已存在
+                folder_id = self.get_folder_id(folder_name)
+                if folder_id:
+                    log.warning("文件夹已存在: %s", folder_name)
+                    return folder_id
 
-            folder_id = result.get('text')
-            if folder_id:
-                print(f"{GREEN}✓ 创建成功，文件夹ID: {folder_id}{RESET}")
-                return folder_id
+                log.info("\n[创建文件夹]")
+                log.info("文件夹名称: %s", folder_name)
 
-            print(f"{RED}✗ 创建失败，无法获取文件夹ID{RESET}")
-            return None
+                result = self._post(
+                    self.doupload_url,
+                    data={
+                        "task": "2",
+                        "parent_id": "-1",  # 创建在根目录下
+                        "folder_name": folder_name,
+                        "folder_description": ""
+                    }
+                )
 
-        except Exception as e:
-            print(f"{RED}✗ 创建文件夹失败: {str(e)}{RESET}")
-            return None
+                folder_id = result.get('text')
+                if folder_id:
+                    log.info(MSG_FOLDER_CREATED, folder_id)
+                    self._add_folder("-1", folder_name, folder_id)
+                    return folder_id
 
-    def upload_file(self, file_path: str, folder_id: str) -> bool:
-        """上传文件到蓝奏云"""
+                log.error("创建失败，无法获取文件夹ID")
+                return None
+
+            except Exception as e:
+                log.error("创建文件夹失败: %s", e)
+                return None
+
+    def upload_file(self, file_path: str, folder_id: str, file_size: Optional[int] = None,
+                    position: int = 0, log: _Log = logger) -> bool:
+        """上传文件到蓝奏云
+        Args:
+            file_path: 文件路径
+            folder_id: 目标文件夹ID
+            file_size: 已知的文件大小(字节)，为None时读取文件信息
+            position: 上传进度条所在行
+            log: 日志记录器，并发处理任务时带有任务前缀
+        """
         if not self.is_login:
-            print(f"{RED}✗ 请先登录{RESET}")
+            log.error("请先登录")
             return False
             
         try:
             file_name = os.path.basename(file_path)
-            print(f"文件名称: {file_name}")
-            print(f"文件大小: {os.path.getsize(file_path) / 1024 / 1024:.2f}MB")
+            if file_size is None:
+                file_size = os.path.getsize(file_path)
+            log.info("文件名称: %s", file_name)
+            log.info("文件大小: %.2fMB", file_size / 1024 / 1024)
             
             # 检查文件是否已存在
             if self.file_exists(folder_id, file_name):
-                print(f"{YELLOW}! 文件已存在，跳过上传: {file_name}{RESET}")
+                log.warning("文件已存在，跳过上传: %s", file_name)
                 return True
                 
             # 上传文件
-            file_size = os.path.getsize(file_path)
+            data = {
+                "task": "1",
+                "vie": "2",
+                "ve": "2",
+                "id": "WU_FILE_0",
+                "name": file_name,
+                "folder_id_bb_n": folder_id
+            }
             with open(file_path, "rb") as f:
-                with tqdm(total=file_size, unit='B', unit_scale=True, desc="上传进度", ncols=100) as pbar:
-                    files = {
-                        "upload_file": (file_name, f, "application/octet-stream")
-                    }
-                    data = {
-                        "task": "1",
-                        "vie": "2",
-                        "ve": "2",
-                        "id": "WU_FILE_0",
-                        "name": file_name,
-                        "folder_id_bb_n": folder_id
-                    }
+                # 边读文件边发送，进度条按实际发送的字节数更新
+                file_field = (file_name, f, "application/octet-stream")
+                encoder = MultipartEncoder(fields=list(data.items()) + [("upload_file", file_field)])
+                with _progress_bar(encoder.len, "上传进度", position) as pbar:
+                    monitor = MultipartEncoderMonitor(encoder, lambda m: pbar.update(m.bytes_read - pbar.n))
                     response = self.session.post(
                         f"{self.base_url}/html5up.php",
-                        files=files,
-                        data=data
+                        data=monitor,
+                        headers={'Content-Type': monitor.content_type}
                     )
-                    pbar.update(file_size)
                     
             if response.status_code != 200:
-                print(f"{RED}✗ 上传失败: HTTP {response.status_code}{RESET}")
+                log.error("上传失败: HTTP %s", response.status_code)
                 return False
                 
             # 解析响应
             try:
-                result = response.json()
+                result = _json.loads(response.content)
                 if result.get("zt") == 1:
-                    print(f"{GREEN}✓ 文件上传成功{RESET}")
+                    log.info(MSG_UPLOAD_OK)
+                    with self._files_lock:
+                        # 已缓存该文件夹的文件列表时，同步记录新上传的文件
+                        names = self._files_cache.get(folder_id)
+                        if names is not None:
+                            names.add(file_name)
+                        # 跨运行的缓存中同样记录，下次运行第一页出现该文件时仍能沿用缓存
+                        pending = self._pending_pages.get(folder_id)
+                        if pending is not None:
+                            pending[0]['uploaded'].add(file_name)
+                        entry = self._listing_cache.get(self._listing_key(folder_id))
+                        if entry is not None:
+                            entry['names'].add(file_name)
+                            entry['uploaded'].add(file_name)
+                            self._save_listing_cache()
                     return True
                     
-                print(f"{RED}✗ 上传失败: {result.get('info', '未知错误')}{RESET}")
+                log.error("上传失败: %s", result.get('info', '未知错误'))
                 return False
                 
             except Exception as e:
-                print(f"{RED}✗ 解析响应失败: {str(e)}{RESET}")
+                log.error("解析响应失败: %s", e)
                 return False
                 
         except Exception as e:
-            print(f"{RED}✗ 上传过程出错: {str(e)}{RESET}")
+            log.error("上传过程出错: %s", e)
             return False
 
-def check_file_size(file_path: str) -> bool:
-    """检查文件大小是否超过限制(100MB)"""
+def check_file_size(file_path: str, size: Optional[int] = None, log: _Log = logger) -> bool:
+    """检查文件大小是否超过限制(100MB)
+    Args:
+        file_path: 文件路径
+        size: 已知的文件大小(字节)，为None时读取文件信息
+        log: 日志记录器，并发处理任务时带有任务前缀
+    """
     try:
-        size = os.path.getsize(file_path)
+        if size is None:
+            size = os.path.getsize(file_path)
         size_mb = size / (1024 * 1024)
         if size_mb > 100:
-            print(f"{RED}✗ 文件大小 {size_mb:.2f}MB 超过限制(100MB){RESET}")
+            log.error("文件大小 %.2fMB 超过限制(100MB)", size_mb)
             return False
         return True
     except Exception as e:
-        print(f"{RED}✗ 检查文件大小失败: {str(e)}{RESET}")
+        log.error("检查文件大小失败: %s", e)
+        return False
+
+def upload_release_file(lanzou: LanZouSession, folder_id: str, save_path: str, index: int, total: int,
+                        position: int = 0, log: _Log = logger) -> bool:
+    """检查并上传已下载的文件，上传成功后删除临时文件
+    Args:
+        lanzou: 已登录的蓝奏云会话
+        folder_id: 目标文件夹ID
+        save_path: 已下载文件的路径
+        index: 文件序号，从1开始
+        total: 文件总数
+        position: 上传进度条所在行
+        log: 日志记录器，并发处理任务时带有任务前缀
+    Returns:
+        bool: 是否上传成功
+    """
+    # 检查文件大小（只读取一次文件信息，上传时沿用）
+    try:
+        file_size = os.stat(save_path).st_size
+    except OSError as e:
+        log.error("检查文件大小失败: %s", e)
+        return False
+    if not check_file_size(save_path, file_size, log):
+        return False
+        
+    # 上传文件
+    log.info(MSG_STEP_UPLOAD, index, total)
+    if not lanzou.upload_file(save_path, folder_id, file_size, position, log):
         return False
+        
+    # 删除已上传的文件
+    os.remove(save_path)
+    log.info(MSG_TEMP_FILE_REMOVED, os.path.basename(save_path))
+    return True
+
+class _TaskLogger(logging.LoggerAdapter):
+    """在日志前加上任务名，多个任务并发输出时可区分来源"""
+    def process(self, msg, kwargs):
+        # 前缀放在消息开头的换行之后
+        text = msg.lstrip('\n')
+        return f"{msg[:len(msg) - len(text)]}[{self.extra['task']}] {text}", kwargs
+
+def process_task(task: Dict, lanzou: LanZouSession, temp_dir: str, slot: int = 0):
+    """处理单个任务：检查最新release，下载并上传到蓝奏云
+    Args:
+        task: 任务配置
+        lanzou: 已登录的蓝奏云会话
+        temp_dir: 临时目录，每个任务在其中使用单独的子目录
+        slot: 任务所在的并发槽位(0 ~ TASK_WORKERS-1)，决定进度条所在的行
+    """
+    url = task.get('url')
+    folder_name = task.get('folder_name')
+    
+    if not url or not folder_name:
+        logger.warning("跳过无效任务配置")
+        return
+        
+    log = _TaskLogger(logger, {'task': folder_name})
+    log.info(MSG_TASK_START)
+    log.info("GitHub URL: %s", url)
+    log.info("目标文件夹: %s", folder_name)
+    
+    # 每个槽位占用DOWNLOAD_WORKERS行下载进度条和1行上传进度条，并发的任务互不覆盖
+    first_row = slot * (DOWNLOAD_WORKERS + 1)
+    upload_row = first_row + DOWNLOAD_WORKERS
+    
+    try:
+        release_files = get_latest_release(url, log)
+        if not release_files:
+            log.error("获取release信息失败")
+            return
+        
+        # 创建文件夹
+        log.info(MSG_STEP_FOLDER)
+        folder_id = lanzou.create_folder(folder_name, log)
+        if not folder_id:
+            return
+        
+        # 不同仓库的资源文件可能重名，每个任务下载到单独的子目录
+        task_dir = tempfile.mkdtemp(dir=temp_dir)
+        
+        # 下载和上传流水线：后面的文件继续下载的同时，按顺序上传已下载完成的文件；
+        # 最多DOWNLOAD_WORKERS个文件处于下载中或等待上传，限制临时文件占用的磁盘空间
+        log.info(MSG_STEP_DOWNLOAD, len(release_files))
+        total = len(release_files)
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+            pending = deque()
+            for index, (download_url, file_name) in enumerate(release_files, 1):
+                save_path = os.path.join(task_dir, file_name)
+                position = first_row + (index - 1) % DOWNLOAD_WORKERS
+                future = executor.submit(download_file, download_url, save_path, position, log)
+                pending.append((index, save_path, future))
+                if len(pending) >= DOWNLOAD_WORKERS:
+                    index, save_path, future = pending.popleft()
+                    if future.result():
+                        upload_release_file(lanzou, folder_id, save_path, index, total, upload_row, log)
+                        
+            while pending:
+                index, save_path, future = pending.popleft()
+                if future.result():
+                    upload_release_file(lanzou, folder_id, save_path, index, total, upload_row, log)
+                    
+        log.info(MSG_TASK_DONE)
+        
+    except Exception as e:
+        log.error("处理任务失败: %s", e)
 
 def main():
     """主函数"""
-    print(f"\n{BLUE}=== GitHub Release 自动下载上传工具 ==={RESET}")
+    listener = setup_logging()
+    try:
+        run()
+    finally:
+        listener.stop()
+
+def run():
+    """处理所有下载上传任务"""
+    logger.info(MSG_TITLE)
     
     # 读取任务配置
     tasks = read_tasks()
     if not tasks:
-        print(f"{RED}✗ 没有找到任务配置{RESET}")
+        logger.error("没有找到任务配置")
         return
         
     # 创建临时目录
     with tempfile.TemporaryDirectory() as temp_dir:
-        print(f"{BLUE}[初始化] 创建临时目录: {temp_dir}{RESET}")
+        logger.info(MSG_TEMP_DIR, temp_dir)
         
         # 创建蓝奏云会话并登录
-        cookie_path = os.path.join(temp_dir, 'cookie.json')
+        cookie_path = os.path.join(temp_dir, 'cookies.txt')
         lanzou = LanZouSession(cookie_path)
         if not lanzou.login():
             return
             
-        # 遍历处理每个任务
-        for task in tasks:
-            url = task.get('url')
-            folder_name = task.get('folder_name')
-            
-            if not url or not folder_name:
-                print(f"{YELLOW}! 跳过无效任务配置{RESET}")
-                continue
-                
-            print(f"\n{BLUE}=== 处理任务 ==={RESET}")
-            print(f"GitHub URL: {url}")
-            print(f"目标文件夹: {folder_name}")
+        # 不同仓库的任务互不依赖，并发处理（同一任务内的文件仍按顺序上传）
+        logger.info(MSG_RUN_TASKS, len(tasks))
+        workers = min(TASK_WORKERS, len(tasks))
+        
+        # 同时运行的任务各取一个空闲槽位，结束后归还，槽位决定进度条所在的行
+        slots = queue.SimpleQueue()
+        for slot in range(workers):
+            slots.put(slot)
             
+        def run_task(task: Dict):
+            slot = slots.get()
             try:
-                # 获取最新release信息
-                release_files = get_latest_release(url)
-                if not release_files:
-                    print(f"{RED}✗ 获取release信息失败{RESET}")
-                    continue
-                
-                # 创建文件夹
-                print(f"\n{BLUE}[1/3] 创建目标文件夹{RESET}")
-                folder_id = lanzou.create_folder(folder_name)
-                if not folder_id:
-                    continue
-                
-                # 下载并上传每个文件
-                for index, (download_url, file_name) in enumerate(release_files, 1):
-                    print(f"\n{BLUE}[2/3] 下载文件 ({index}/{len(release_files)}){RESET}")
-                    save_path = os.path.join(temp_dir, file_name)
-                    
-                    # 下载文件
-                    if not download_file(download_url, save_path):
-                        continue
-                        
-                    # 检查文件大小
-                    if not check_file_size(save_path):
-                        continue
-                        
-                    # 上传文件
-                    print(f"\n{BLUE}[3/3] 上传文件 ({index}/{len(release_files)}){RESET}")
-                    if not lanzou.upload_file(save_path, folder_id):
-                        continue
-                    
-                    # 删除已上传的文件
-                    os.remove(save_path)
-                    print(f"{BLUE}[清理] 删除临时文件: {file_name}{RESET}")
-                    
-                print(f"\n{GREEN}✓ 任务完成{RESET}")
+                process_task(task, lanzou, temp_dir, slot)
+            finally:
+                slots.put(slot)
                 
-            except Exception as e:
-                print(f"{RED}✗ 处理任务失败: {str(e)}{RESET}")
-                continue
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(run_task, tasks))
                 
-    print(f"\n{BLUE}[清理] 删除临时目录{RESET}")
-    print(f"\n{GREEN}=== 所有任务处理完成 ==={RESET}")
+    logger.info(MSG_TEMP_DIR_REMOVED)
+    logger.info(MSG_ALL_DONE)
         
 if __name__ == "__main__":
     main() 
\ No newline at end of file